@@ -1,11 +1,13 @@
 # app/api/audit.py
 
 from fastapi import APIRouter, Query, Path
-from typing import List, Dict, DefaultDict, Any
-from collections import defaultdict
+from app.core.responses import FastJSONResponse
+from typing import List, Dict, Any, Callable
+from itertools import groupby
 
 from app.schemas.audit import AuditEvent
 from app.services.audit_service import AuditService
+from app.utils.dict_utils import pick
 
 router = APIRouter(tags=["audit"])
 
@@ -13,82 +15,111 @@ router = APIRouter(tags=["audit"])
 # =================================================
 # 🧠 SMART CONTEXT BUILDER (Universal Engine)
 # =================================================
-def _build_context(event_type: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    ctx = []
 
-    # --- 1. CASE INGESTED ---
-    if event_type == "CASE_INGESTED":
-        # ดึงค่าแบบกันเหนียว (Fallback)
-        vendor = payload.get("vendor") or payload.get("vendor_name") or "-"
-        po = payload.get("po_number") or payload.get("po") or "-"
-        amt = payload.get("amount") or payload.get("amount_total") or 0
-
-        ctx.append({"label": "Vendor", "value": vendor, "highlight": True})
-        ctx.append({"label": "PO No.", "value": po, "type": "mono"})
-        ctx.append({
+# --- 1. CASE INGESTED ---
+def _ctx_case_ingested(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # ดึงค่าแบบกันเหนียว (Fallback)
+    vendor = pick(payload, "vendor", "vendor_name", default="-")
+    po = pick(payload, "po_number", "po", default="-")
+    amt = pick(payload, "amount", "amount_total", default=0)
+
+    return [
+        {"label": "Vendor", "value": vendor, "highlight": True},
+        {"label": "PO No.", "value": po, "type": "mono"},
+        {
             "label": "Amount", 
             "value": f"{amt:,.2f} THB", 
             "type": "currency", 
             "fullWidth": True
-        })
+        },
+    ]
 
-    # --- 2. RULE EVALUATED ---
-    elif event_type == "RULE_EVALUATED":
-        rule = payload.get("rule", {})
-        inputs = payload.get("inputs", {})
-        hit = payload.get("hit", False)
 
-        # ชื่อกฎ
-        ctx.append({
-            "label": "Rule", 
-            "value": rule.get("description") or rule.get("id"),
-            "fullWidth": True
-        })
+# --- 2. RULE EVALUATED ---
+# field ที่ไม่ต้องแสดงใน Evaluation Logic
+_RULE_INPUT_BLACKLIST = frozenset(("vendor_name", "line_items", "description"))
+
+
+def _ctx_rule_evaluated(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ctx = []
+    rule = payload.get("rule", {})
+    inputs = payload.get("inputs", {})
+    hit = payload.get("hit", False)
+
+    # ชื่อกฎ
+    ctx.append({
+        "label": "Rule", 
+        "value": rule.get("description") or rule.get("id"),
+        "fullWidth": True
+    })
+    
+    # ผลลัพธ์ (Badge)
+    ctx.append({
+        "label": "Status", 
+        "value": "RISK DETECTED" if hit else "PASSED", 
+        "type": "badge",
+        "badgeColor": "red" if hit else "green"
+    })
+
+    # Logic Inputs (สำคัญมาก: บอกว่าทำไมถึงผ่าน/ไม่ผ่าน)
+    if inputs:
+        # ✅ Filter: กรอง field ที่ไม่จำเป็นออก เพื่อไม่ให้รก Timeline
+        kv_pairs = [
+            f"{k}={v}" for k, v in inputs.items()
+            if v is not None and k not in _RULE_INPUT_BLACKLIST
+        ]
         
-        # ผลลัพธ์ (Badge)
-        ctx.append({
-            "label": "Status", 
-            "value": "RISK DETECTED" if hit else "PASSED", 
-            "type": "badge",
-            "badgeColor": "red" if hit else "green"
-        })
+        if kv_pairs:
+            ctx.append({
+                "label": "Evaluation Logic", 
+                "value": " | ".join(kv_pairs), 
+                "type": "mono", 
+                "fullWidth": True
+            })
+
+    return ctx
+
+
+# --- 3. DECISION RECOMMENDED ---
+def _ctx_decision_recommended(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rec = payload.get("recommendation", {})
+    return [
+        {"label": "AI Decision", "value": rec.get("decision"), "type": "badge", "badgeColor": "purple"},
+        {"label": "Role Required", "value": rec.get("required_role")},
+    ]
 
-        # Logic Inputs (สำคัญมาก: บอกว่าทำไมถึงผ่าน/ไม่ผ่าน)
-        if inputs:
-            kv_pairs = []
-            for k, v in inputs.items():
-                # ✅ Filter: กรอง field ที่ไม่จำเป็นออก เพื่อไม่ให้รก Timeline
-                if v is not None and k not in ["vendor_name", "line_items", "description"]:
-                    kv_pairs.append(f"{k}={v}")
-            
-            if kv_pairs:
-                ctx.append({
-                    "label": "Evaluation Logic", 
-                    "value": " | ".join(kv_pairs), 
-                    "type": "mono", 
-                    "fullWidth": True
-                })
-
-    # --- 3. DECISION RECOMMENDED ---
-    elif event_type == "DECISION_RECOMMENDED":
-        rec = payload.get("recommendation", {})
-        ctx.append({"label": "AI Decision", "value": rec.get("decision"), "type": "badge", "badgeColor": "purple"})
-        ctx.append({"label": "Role Required", "value": rec.get("required_role")})
-
-    # --- 4. GENERIC FALLBACK ---
-    else:
-        for k in ["reason", "action", "source"]:
-            if val := payload.get(k):
-                ctx.append({"label": k.title(), "value": str(val)})
 
+# --- 4. GENERIC FALLBACK ---
+def _ctx_generic(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ctx = []
+    for k in ["reason", "action", "source"]:
+        if val := payload.get(k):
+            ctx.append({"label": k.title(), "value": str(val)})
     return ctx
 
 
+# event_type -> builder (one dict lookup per event instead of an if/elif chain)
+_CTX_BUILDERS: Dict[str, Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = {
+    "CASE_INGESTED": _ctx_case_ingested,
+    "RULE_EVALUATED": _ctx_rule_evaluated,
+    "DECISION_RECOMMENDED": _ctx_decision_recommended,
+}
+
+
+def _build_context(event_type: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return _CTX_BUILDERS.get(event_type, _ctx_generic)(payload)
+
+
+# เฉพาะ column ที่ AuditEvent ใช้จริง (payload ยังต้องใช้: context + details)
+_AUDIT_EVENT_COLUMNS = "event_id,case_id,event_type,actor,payload,created_at"
+
+
 def _build_audit_events(case_id: str) -> List[AuditEvent]:
     """
     Transform raw audit_events rows into AuditEvent schema
+    (rows come from our own store -> built with model_construct, no re-validation)
     """
-    raw_events = AuditService.list_by_case(case_id)
+    raw_events = AuditService.list_by_case(case_id, projection=_AUDIT_EVENT_COLUMNS)
     results: List[AuditEvent] = []
 
     for e in raw_events:
@@ -102,7 +133,7 @@ def _build_audit_events(case_id: str) -> List[AuditEvent]:
         message = payload.get("message") or payload.get("reason") or event_type
 
         results.append(
-            AuditEvent(
+            AuditEvent.model_construct(
                 event_id=e.get("event_id"),
                 case_id=e.get("case_id"),
                 event_type=event_type,
@@ -121,20 +152,29 @@ def _build_audit_events(case_id: str) -> List[AuditEvent]:
     return results
 
 
+def _run_id_of(e: AuditEvent) -> str:
+    return (e.details or {}).get("run_id") or "__NO_RUN__"
+
+
 def _group_events_by_run(events: List[AuditEvent]) -> List[Dict]:
     """
     Group audit events by run_id (Audit API v2 behavior)
     """
-    runs: DefaultDict[str, List[AuditEvent]] = defaultdict(list)
-    for e in events:
-        run_id = (e.details or {}).get("run_id") or "__NO_RUN__"
-        runs[run_id].append(e)
+    # one sort by (run_id, timestamp); each run is then a contiguous, time-ordered block
+    events_sorted = sorted(events, key=lambda e: (_run_id_of(e), e.timestamp or ""))
 
     grouped: List[Dict] = []
-    for run_id, evts in runs.items():
-        evts_sorted = sorted(evts, key=lambda x: x.timestamp)
-        started = next((e.timestamp for e in evts_sorted if e.event_type == "DECISION_RUN_STARTED"), None)
-        completed = next((e.timestamp for e in evts_sorted if e.event_type == "DECISION_RUN_COMPLETED"), None)
+    for run_id, run_events in groupby(events_sorted, key=_run_id_of):
+        evts_sorted = list(run_events)
+
+        # single walk captures both boundaries (first occurrence wins)
+        started = completed = None
+        for e in evts_sorted:
+            if started is None and e.event_type == "DECISION_RUN_STARTED":
+                started = e.timestamp
+            elif completed is None and e.event_type == "DECISION_RUN_COMPLETED":
+                completed = e.timestamp
+
         grouped.append({
             "run_id": run_id,
             "started_at": started,
@@ -145,23 +185,32 @@ def _group_events_by_run(events: List[AuditEvent]) -> List[Dict]:
     return grouped
 
 
+def _dump_events(events: List[AuditEvent]) -> List[Dict[str, Any]]:
+    return [e.model_dump() for e in events]
+
+
 # =================================================
 # Endpoints
 # =================================================
-@router.get("/audit-events", response_model=List[AuditEvent])
+# response_model is kept for the OpenAPI schema only; returning FastJSONResponse
+# skips FastAPI's second validate + jsonable_encoder pass over every event.
+@router.get("/audit-events", response_model=List[AuditEvent], response_class=FastJSONResponse)
 def get_audit_events(case_id: str = Query(..., description="Case ID")):
-    return _build_audit_events(case_id)
+    return FastJSONResponse(_dump_events(_build_audit_events(case_id)))
 
-@router.get("/audit/case/{case_id}", response_model=List[AuditEvent])
+@router.get("/audit/case/{case_id}", response_model=List[AuditEvent], response_class=FastJSONResponse)
 def get_audit_events_by_case(case_id: str = Path(..., description="Case ID")):
-    return _build_audit_events(case_id)
+    return FastJSONResponse(_dump_events(_build_audit_events(case_id)))
 
-@router.get("/cases/{case_id}/audit")
+@router.get("/cases/{case_id}/audit", response_class=FastJSONResponse)
 def get_case_audit_v2(
     case_id: str = Path(...),
     group: str = Query("flat"),
 ):
     events = _build_audit_events(case_id)
     if group == "run":
-        return _group_events_by_run(events)
-    return events
\ No newline at end of file
+        grouped = _group_events_by_run(events)
+        for g in grouped:
+            g["events"] = _dump_events(g["events"])
+        return FastJSONResponse(grouped)
+    return FastJSONResponse(_dump_events(events))
\ No newline at end of file
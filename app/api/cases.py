@@ -1,21 +1,37 @@
 # app/api/cases.py
 
-from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi import APIRouter, HTTPException, Request, Response, Query, BackgroundTasks
+from app.core.responses import FastJSONResponse
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import hashlib
-import json
-from pydantic import BaseModel, Field
+import logging
+from pydantic import BaseModel, ConfigDict, Field
 import math
 
 # Schema imports
 from app.schemas.case import CaseDetail
 from app.schemas.portfolio import CasePortfolioItem
 from app.schemas.decision import DecisionSummary
+from app.repositories.base import CaseRepository
 from app.services.audit_service import AuditService
+from app.services.case_version import cases_version, invalidate_cases_version
+from app.utils.json_utils import canonical_json_bytes
+from app.utils.currency_utils import extract_amount
+from app.utils.dict_utils import pick
 
 # Decision Logic
-from app.api.decisions import execute_decision_run, load_policy_yaml
+from app.services.decision_runner import execute_decision_run, load_policy_yaml
+
+__all__ = ["router"]
+
+logger = logging.getLogger(__name__)
+
+_HIGH_RISK = frozenset(("HIGH", "CRITICAL"))
+
+# payload fallback order for display fields
+_VENDOR_KEYS = ("vendor_name", "vendor_id", "vendor")
+_AMOUNT_KEYS = ("amount_total", "amount")
 
 router = APIRouter(tags=["cases"])
 
@@ -23,13 +39,15 @@ router = APIRouter(tags=["cases"])
 # Schemas
 # =================================================
 class CaseIngestRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     case_id: str = Field(..., description="Enterprise case ID")
     domain: str = Field(default="procurement")
     payload: Dict[str, Any]
 
 class CaseStats(BaseModel):
     total_exposure: float
-    high_risk_count: int
+    high_risk_count: int = Field(..., description="Cases with risk_level HIGH or CRITICAL")
     open_cases: int
 
 class PaginatedCaseResponse(BaseModel):
@@ -42,12 +60,26 @@ class PaginatedCaseResponse(BaseModel):
 # =================================================
 # ✅ Single Source of Truth — Risk Read Model
 # =================================================
-def determine_risk_display(payload: Dict) -> str:
+def determine_risk_display(payload: Dict, record: Optional[Dict] = None) -> str:
     """
     Read-model for risk.
-    Source of truth = payload.risk_level (written by decision engine)
+    Source of truth = case.risk_level, materialized at write time
+    (ingest / decision run); falls back to payload.risk_level.
     """
-    return payload.get("risk_level", "LOW")
+    return (record or {}).get("risk_level") or payload.get("risk_level", "LOW")
+
+# =================================================
+# ✅ HTTP caching (ETag / 304)
+# =================================================
+def _weak_etag(data: bytes) -> str:
+    return f'W/"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
 
 # =================================================
 # 1. GET Stats
@@ -58,40 +90,30 @@ def get_case_stats(request: Request):
     if not case_repo:
         return {"total_exposure": 0, "high_risk_count": 0, "open_cases": 0}
     
-    all_cases = case_repo.list_cases()
-    
-    total_exposure = 0
-    high_risk = 0
-    
-    for c in all_cases:
-        payload = c.get("payload", {})
-        
-        # ---- exposure ----
-        try:
-            raw_amt = payload.get("amount_total") or payload.get("amount") or 0
-            if isinstance(raw_amt, str):
-                amt = float(raw_amt.replace(",", ""))
-            else:
-                amt = float(raw_amt)
-        except:
-            amt = 0
-
-        total_exposure += amt
-        
-        # ---- risk ----
-        if determine_risk_display(payload) in ["HIGH", "CRITICAL"]:
-            high_risk += 1
-            
-    return {
-        "total_exposure": total_exposure,
-        "high_risk_count": high_risk,
-        "open_cases": len(all_cases)
-    }
+    return case_repo.case_stats()
 
 # =================================================
 # 2. GET List (FIXED FILTERS & SEARCH)
 # =================================================
-@router.get("", response_model=PaginatedCaseResponse)
+def _portfolio_item(r: Dict[str, Any]) -> Dict[str, Any]:
+    """trusted repo row -> plain dict in CasePortfolioItem shape (no model build / dump)"""
+    payload = r.get("payload", {})
+    return {
+        "id": r["case_id"],
+        "domain": r.get("domain", "procurement"),
+        "vendor_id": pick(payload, *_VENDOR_KEYS, default="Unknown Vendor"),
+        "amount_total": extract_amount(payload),
+        "status": r.get("status", "OPEN"),
+        "pending_reason": payload.get("pending_reason"),
+        "priority_score": payload.get("priority_score"),
+        "priority_reason": payload.get("priority_reason"),
+
+        "risk_level": determine_risk_display(payload, r),
+
+        "created_at": r.get("created_at"),
+    }
+
+@router.get("", response_model=PaginatedCaseResponse, response_class=FastJSONResponse)
 def list_cases(
     request: Request,
     page: int = Query(1, ge=1),
@@ -104,9 +126,6 @@ def list_cases(
     if not case_repo:
         return {"items": [], "total": 0, "page": page, "size": size, "pages": 0}
 
-    all_rows = case_repo.list_cases()
-    filtered = []
-
     # ---------------------------------------------
     # ✅ 1. Prepare Filter Inputs (Normalize)
     # ---------------------------------------------
@@ -114,116 +133,45 @@ def list_cases(
     q_risk = risk.upper() if risk and risk != "ALL" else None
     q_status = status.upper() if status and status != "ALL" else None
 
-    for r in all_rows:
-        payload = r.get("payload", {})
-        
-        # -----------------------------------------
-        # ✅ 2. Normalize Data Values
-        # -----------------------------------------
-        # Risk
-        p_risk_val = determine_risk_display(payload)
-        p_risk_norm = str(p_risk_val).upper()
-        
-        # Status
-        p_status_val = r.get("status", "OPEN")
-        p_status_norm = str(p_status_val).upper()
-
-        # Search Fields
-        p_id = r["case_id"].lower()
-        v_name = str(payload.get("vendor_name") or "").lower()
-        v_id = str(payload.get("vendor_id") or "").lower()
-        v_raw = str(payload.get("vendor") or "").lower()
-        p_po = str(payload.get("po_number") or "").lower()
-
-        # -----------------------------------------
-        # ✅ 3. Apply Filters
-        # -----------------------------------------
-        
-        # Filter: Risk
-        if q_risk and p_risk_norm != q_risk:
-            continue
-
-        # Filter: Status
-        if q_status and p_status_norm != q_status:
-            continue
-
-        # Filter: Search (Smart Search covers PO, ID, Vendor)
-        if q_search:
-            is_match = (
-                (q_search in p_id) or 
-                (q_search in v_name) or 
-                (q_search in v_id) or 
-                (q_search in v_raw) or
-                (q_search in p_po)
-            )
-            if not is_match:
-                continue
-            
-        # Store computed risk for display
-        r["_computed_risk"] = p_risk_val 
-        filtered.append(r)
-
-    # ---------------------------------------------------------
-    # Sort by Date DESC (Newest First) BEFORE Paging
-    # ---------------------------------------------------------
-    #filtered.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    # ป้องกันการระเบิดถ้า created_at ใน DB เป็น Null
-    filtered.sort(key=lambda x: x.get("created_at") or "", reverse=True)
-    
-    # ---- paging ----
-    total = len(filtered)
-    start = (page - 1) * size
-    end = start + size
-    paginated_rows = filtered[start:end]
-
-    items = []
-    for r in paginated_rows:
-        payload = r.get("payload", {})
-        
-        vendor_display = (
-            payload.get("vendor_name") or 
-            payload.get("vendor_id") or 
-            payload.get("vendor") or 
-            "Unknown Vendor"
-        )
+    # ---------------------------------------------
+    # ✅ ETag: same query + unchanged portfolio -> 304 (no page read / encode)
+    # ---------------------------------------------
+    count, newest = cases_version(case_repo)
+    etag = _weak_etag(
+        "\x1f".join(map(str, (count, newest, page, size, q_search, q_risk, q_status))).encode("utf-8")
+    )
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
-        amount_display = (
-            payload.get("amount_total") or 
-            payload.get("amount") or 
-            0
-        )
+    # ---------------------------------------------
+    # ✅ 2. Filter / Sort (newest first) / Page in the repository
+    # ---------------------------------------------
+    start = (page - 1) * size
+    paginated_rows, total = case_repo.query_cases(
+        risk=q_risk,
+        status=q_status,
+        search=q_search,
+        offset=start,
+        limit=size,
+        cards=True,
+    )
 
-        items.append(
-            CasePortfolioItem(
-                id=r["case_id"],
-                domain=r.get("domain", "procurement"),
-                vendor_id=vendor_display,
-                amount_total=amount_display,
-                status=r.get("status", "OPEN"),
-                pending_reason=payload.get("pending_reason"),
-                priority_score=payload.get("priority_score"),
-                priority_reason=payload.get("priority_reason"),
-                
-                # Use value from loop
-                risk_level=r.get("_computed_risk", "LOW"),
-
-                created_at=r.get("created_at"),
-            )
-        )
+    items = [_portfolio_item(r) for r in paginated_rows]
 
-    return {
+    # response_model stays for the OpenAPI schema; FastJSONResponse bypasses re-validation
+    return FastJSONResponse({
         "items": items,
         "total": total,
         "page": page,
         "size": size,
         "pages": math.ceil(total / size) if size > 0 else 1
-    }
+    }, headers={"ETag": etag})
 
 # =================================================
 # 3. GET Case Detail (UPDATED WITH STORY)
 # =================================================
 @router.get("/{case_id}", response_model=CaseDetail)
-def get_case(case_id: str, request: Request):
+def get_case(case_id: str, request: Request, response: Response):
     case_repo = getattr(request.app.state, "case_repo", None)
     if not case_repo:
         raise HTTPException(status_code=500)
@@ -232,13 +180,19 @@ def get_case(case_id: str, request: Request):
     if not case:
         raise HTTPException(status_code=404)
 
+    # ✅ ETag from the stored record: unchanged case -> 304 (skip story build / encode)
+    etag = _weak_etag(canonical_json_bytes(case))
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     payload = case.get("payload", {})
     
     # ---- risk ----
-    risk = determine_risk_display(payload)
+    risk = determine_risk_display(payload, case)
 
-    vendor_display = payload.get("vendor_name") or payload.get("vendor_id") or payload.get("vendor")
-    amount_display = payload.get("amount_total") or payload.get("amount") or 0
+    vendor_display = pick(payload, *_VENDOR_KEYS)
+    amount_display = pick(payload, *_AMOUNT_KEYS, default=0)
 
     decision_summary = DecisionSummary(
         decision_required=case.get("status") == "OPEN",
@@ -252,8 +206,7 @@ def get_case(case_id: str, request: Request):
     # ✅ GENERATE DECISION STORY (Mock Logic)
     # ----------------------------------------------------
     story_data = None
-    print(risk);
-    if risk in ["HIGH", "CRITICAL"]:
+    if risk in _HIGH_RISK:
         story_data = {
             "headline": f"Why this case is {risk}",
             "risk_drivers": [
@@ -323,8 +276,23 @@ def get_case(case_id: str, request: Request):
 # =================================================
 # 4. Ingest
 # =================================================
+def _auto_eval(record: Dict[str, Any], policy_id: str, policy_version: str, case_repo: CaseRepository):
+    """Auto run decision หลัง ingest (รันเป็น background task หลังส่ง response แล้ว)"""
+    try:
+        policy = load_policy_yaml(policy_id, policy_version)
+        execute_decision_run(
+            case=record,
+            policy=policy,
+            policy_id=policy_id,
+            policy_version=policy_version,
+            repo=case_repo,
+        )
+        logger.debug("🚀 Auto-evaluated case %s on ingest", record["case_id"])
+    except Exception as e:
+        logger.warning("⚠️ Auto-evaluation failed for case %s: %s", record["case_id"], e)
+
 @router.post("/ingest")
-def ingest_case(data: CaseIngestRequest, request: Request):
+def ingest_case(data: CaseIngestRequest, request: Request, background: BackgroundTasks):
     case_repo = getattr(request.app.state, "case_repo", None)
     if not case_repo:
         raise HTTPException(status_code=500)
@@ -333,15 +301,16 @@ def ingest_case(data: CaseIngestRequest, request: Request):
         AuditService.write("INGESTION_FAILED", {"case_id": data.case_id, "reason": "Duplicate"}, "SYSTEM")
         raise HTTPException(status_code=409, detail=f"Case exists")
 
-    now = datetime.utcnow().isoformat()
+    now = datetime.now(timezone.utc).isoformat(timespec="microseconds")
     payload_data = data.payload or {}
     
-    vendor_display = payload_data.get("vendor_name") or payload_data.get("vendor_id") or "Unknown"
-    amount_display = payload_data.get("amount_total") or payload_data.get("amount") or 0
+    vendor_display = pick(payload_data, *_VENDOR_KEYS, default="Unknown")
+    amount_display = pick(payload_data, *_AMOUNT_KEYS, default=0)
     po_display = payload_data.get("po_number") or "-"
 
     try:
-        payload_hash = hashlib.sha256(json.dumps(payload_data, sort_keys=True).encode()).hexdigest()
+        # integrity fingerprint, not a security control -> allow the non-FIPS fast path
+        payload_hash = hashlib.sha256(canonical_json_bytes(payload_data), usedforsecurity=False).hexdigest()
     except:
         payload_hash = "HASH_ERR"
 
@@ -355,10 +324,12 @@ def ingest_case(data: CaseIngestRequest, request: Request):
         "payload": payload_data,
         "policy_id": policy_id, 
         "policy_version": policy_version,
+        "risk_level": determine_risk_display(payload_data),
         "created_at": now,
         "updated_at": now,
     }
     case_repo.save_case(record)
+    invalidate_cases_version()  # new case -> list ETags must change now, not after the TTL
 
     AuditService.write(
         event_type="CASE_INGESTED",
@@ -370,21 +341,12 @@ def ingest_case(data: CaseIngestRequest, request: Request):
             "vendor": vendor_display,
             "amount": amount_display,
             "po_number": po_display,
-            "integrity_hash": payload_hash
+            "integrity_hash": payload_hash,
+            "integrity_hash_algo": "sha256",
         }
     )
 
-    # ---- auto run decision ----
-    try:
-        policy = load_policy_yaml(policy_id, policy_version)
-        execute_decision_run(
-            case=record,
-            policy=policy,
-            policy_id=policy_id,
-            policy_version=policy_version
-        )
-        print(f"🚀 Auto-evaluated case {data.case_id} on ingest")
-    except Exception as e:
-        print(f"⚠️ Auto-evaluation failed: {e}")
+    # ---- auto run decision (ไม่ block response) ----
+    background.add_task(_auto_eval, record, policy_id, policy_version, case_repo)
 
     return {"status": "OK", "case_id": data.case_id}
\ No newline at end of file
@@ -1,11 +1,13 @@
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from app.services.copilot_agent import CopilotAgent
 
 router = APIRouter(tags=["copilot"])
 
 class ChatRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     query: str
     case_id: str
 
@@ -1,12 +1,14 @@
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.services.copilot_orchestrator import CopilotOrchestrator
 
 router = APIRouter(tags=["copilot"])
 
 class CopilotStreamRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     question: str
 
 @router.post("/stream")
@@ -3,6 +3,8 @@ from fastapi import APIRouter, Request
 #from app.services.demo_loader import load_demo_data
 
 from app.services.demo_loader import seed_demo_data
+from app.services.decision_runner import clear_caches
+from app.services.case_version import invalidate_cases_version
 
 
 router = APIRouter(tags=["demo"])
@@ -13,6 +15,9 @@ def load_demo(request: Request):
     audit_repo = getattr(request.app.state, "audit_repo", None)
     case_repo = getattr(request.app.state, "case_repo", None)
 
+    # demo data may ship new policy / contract files -> drop the decision caches
+    clear_caches()
+
     demo_db = seed_demo_data(audit_repo=audit_repo)
     cases = demo_db.get("cases", [])
 
@@ -32,4 +37,7 @@ def load_demo(request: Request):
                 },
             )
 
+    # seeded / re-saved cases -> list ETags must change now, not after the TTL
+    invalidate_cases_version()
+
     return {"status": "loaded", "summary": {"cases": len(cases)}}
@@ -10,6 +10,7 @@ from app.services.copilot_agent import CopilotAgent
 
 
 from fastapi.responses import StreamingResponse
+from app.core.responses import FastJSONResponse
 
 
 router = APIRouter(tags=["copilot"])
@@ -58,7 +59,7 @@ class EvidenceSuggestResponse(BaseModel):
 # Endpoint — /evidence/suggest  (เดิม / ห้ามกระทบ)
 # ============================================================
 
-@router.post("/suggest", response_model=EvidenceSuggestResponse)
+@router.post("/suggest", response_model=EvidenceSuggestResponse, response_class=FastJSONResponse)
 def suggest_evidence(req: EvidenceSuggestRequest):
     client = get_openai_client()
 
@@ -129,7 +130,7 @@ class EvidenceAttachResponse(BaseModel):
 # Endpoint — /evidence/attach  (ใหม่ / backend-only)
 # ============================================================
 
-@router.post("/attach", response_model=EvidenceAttachResponse)
+@router.post("/attach", response_model=EvidenceAttachResponse, response_class=FastJSONResponse)
 def attach_evidence(req: EvidenceAttachRequest):
     if not req.evidence:
         raise HTTPException(status_code=400, detail="NO_EVIDENCE_PROVIDED")
@@ -3,6 +3,7 @@ import os
 from app.schemas.ingestion import DocumentResponse
 from typing import List
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from uuid import UUID
 # Import Service และ Schema
@@ -88,7 +89,8 @@ async def ingest_document(file: UploadFile = File(...)):
 @router.get("/", response_model=List[DocumentResponse])
 async def list_documents():
     service = IngestionService()
-    return service.get_knowledge_base()
+    # sync Supabase call -> worker thread (ไม่ block event loop)
+    return await run_in_threadpool(service.get_knowledge_base)
 
 @router.get("/{doc_id}/url")
 async def get_document_view_url(doc_id: UUID):
@@ -97,7 +99,7 @@ async def get_document_view_url(doc_id: UUID):
     """
     try:
         service = IngestionService()
-        return service.get_document_url(doc_id)
+        return await run_in_threadpool(service.get_document_url, doc_id)
     except Exception as e:
         # ✅ เพิ่มบรรทัดนี้เพื่อดู Error จริงใน Terminal
         import traceback
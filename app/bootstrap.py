@@ -1,5 +1,6 @@
 # app/bootstrap.py
 from fastapi import FastAPI
+from app.core.responses import FastJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
@@ -12,7 +13,8 @@ from app.api.router import api_router
 def create_app() -> FastAPI:
     setup_logging()
 
-    app = FastAPI(title=settings.app_name)
+    # orjson encoder for every JSON response (stdlib fallback when orjson is missing)
+    app = FastAPI(title=settings.app_name, default_response_class=FastJSONResponse)
 
     # -------------------------
     # Middleware
@@ -9,6 +9,12 @@ class Settings(BaseSettings):
     api_prefix: str = "/api"
     cors_allow_origins: str = "*"
 
+    # -------------------------
+    # Decisions
+    # -------------------------
+    # False -> rule_results / audit keep only the per-rule outcome (no per-condition text)
+    audit_verbose: bool = True
+
     # -------------------------
     # Supabase
     # -------------------------
@@ -0,0 +1,20 @@
+# app/core/responses.py
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.utils.json_utils import json_serializer, orjson
+
+
+class _StdJSONResponse(JSONResponse):
+    """stdlib fallback that still encodes what orjson does natively (datetime, Decimal, UUID ...)"""
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(
+            content, ensure_ascii=False, separators=(",", ":"), default=json_serializer
+        ).encode("utf-8")
+
+
+# ORJSONResponse asserts orjson is importable when it renders -> only use it when it is
+FastJSONResponse = ORJSONResponse if orjson is not None else _StdJSONResponse
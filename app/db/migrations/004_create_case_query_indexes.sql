@@ -0,0 +1,50 @@
+-- =====================================================
+-- 004_create_case_query_indexes.sql
+-- Portfolio list / stats pushed down to Postgres
+-- =====================================================
+
+-- -----------------------------------------------------
+-- Indexes for list_cases (filter + newest-first paging)
+-- -----------------------------------------------------
+create index if not exists cases_created_at_idx
+on cases (created_at desc nulls last);
+
+create index if not exists cases_status_idx
+on cases (status);
+
+create index if not exists cases_payload_risk_level_idx
+on cases ((payload->'payload'->>'risk_level'));
+
+-- -----------------------------------------------------
+-- Portfolio aggregates (GET /cases/stats)
+-- -----------------------------------------------------
+create or replace function case_stats()
+returns table (
+    total_exposure numeric,
+    high_risk_count bigint,
+    open_cases bigint
+)
+language sql
+stable
+as $$
+    with amounts as (
+        select
+            replace(
+                coalesce(
+                    nullif(payload->'payload'->>'amount_total', ''),
+                    nullif(payload->'payload'->>'amount', ''),
+                    '0'
+                ),
+                ',', ''
+            ) as raw_amt,
+            coalesce(payload->'payload'->>'risk_level', 'LOW') as risk_level
+        from cases
+    )
+    select
+        coalesce(sum(
+            case when raw_amt ~ '^-?[0-9]+(\.[0-9]+)?$' then raw_amt::numeric else 0 end
+        ), 0) as total_exposure,
+        count(*) filter (where risk_level in ('HIGH', 'CRITICAL')) as high_risk_count,
+        count(*) as open_cases
+    from amounts;
+$$;
@@ -0,0 +1,77 @@
+-- =====================================================
+-- 005_add_cases_risk_level.sql
+-- Materialized risk_level column (written at ingest / decision run)
+-- =====================================================
+
+alter table cases add column if not exists risk_level text;
+
+-- Backfill from the decision engine's payload value
+update cases
+set risk_level = coalesce(payload->'payload'->>'risk_level', 'LOW')
+where risk_level is null;
+
+create index if not exists cases_risk_level_idx
+on cases (risk_level);
+
+drop index if exists cases_payload_risk_level_idx;
+
+-- -----------------------------------------------------
+-- extract_amount(payload) — mirrors app.utils.currency_utils.extract_amount
+--   pick(amount_total, amount): first Python-truthy value
+--     (null / false / 0 / '' / [] / {} fall through; the string '0' does not)
+--   to_float: drop commas, trim, accept what float() accepts
+--     ('+5', ' 1000 ', '1e3', '1_000', '.5', '1.'); anything else -> 0
+--   Known divergence: 'inf' / 'nan' strings and non-ASCII digits count as 0 here
+-- -----------------------------------------------------
+create or replace function extract_amount(p jsonb)
+returns numeric
+language sql
+immutable
+as $$
+    with picked as (
+        select v
+        from (values (1, p->'amount_total'), (2, p->'amount')) as k(ord, v)
+        where v is not null
+          and v not in ('null'::jsonb, 'false'::jsonb, '""'::jsonb, '[]'::jsonb, '{}'::jsonb)
+          and not (jsonb_typeof(v) = 'number' and (v #>> '{}')::numeric = 0)
+        order by ord
+        limit 1
+    ), txt as (
+        select
+            jsonb_typeof(v) as t,
+            btrim(replace(v #>> '{}', ',', ''), E' \t\n\r\f\v') as s
+        from picked
+    )
+    select coalesce((
+        select case
+            when t = 'number' then s::numeric
+            when t = 'boolean' then 1  -- only true survives pick; float(True) = 1.0
+            when t = 'string'
+                 and s ~ '^[+-]?(\d(_?\d)*(\.(\d(_?\d)*)?)?|\.\d(_?\d)*)([eE][+-]?\d(_?\d)*)?$'
+                then replace(s, '_', '')::numeric
+            else 0
+        end
+        from txt
+    ), 0);
+$$;
+
+-- -----------------------------------------------------
+-- Portfolio aggregates read the column instead of the payload
+-- -----------------------------------------------------
+create or replace function case_stats()
+returns table (
+    total_exposure numeric,
+    high_risk_count bigint,
+    open_cases bigint
+)
+language sql
+stable
+as $$
+    select
+        coalesce(sum(extract_amount(payload->'payload')), 0) as total_exposure,
+        count(*) filter (
+            where coalesce(nullif(risk_level, ''), payload->'payload'->>'risk_level', 'LOW') in ('HIGH', 'CRITICAL')
+        ) as high_risk_count,
+        count(*) as open_cases
+    from cases;
+$$;
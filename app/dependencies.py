@@ -1,5 +1,6 @@
 # app/dependencies.py
 import logging
+from functools import lru_cache
 from fastapi import FastAPI
 
 from app.repositories.supabase_repo import SupabaseCaseRepository
@@ -10,6 +11,15 @@ from app.services.orchestrator import DecisionOrchestrator
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def get_case_repo() -> SupabaseCaseRepository:
+    """
+    Process-wide case repository (created once, on first use).
+    app.state.case_repo and code paths without a request share this instance.
+    """
+    return SupabaseCaseRepository()
+
+
 def init_repositories(app: FastAPI) -> None:
     """
     Initialize infrastructure dependencies.
@@ -17,7 +27,7 @@ def init_repositories(app: FastAPI) -> None:
     """
     try:
         app.state.audit_repo = SupabaseAuditRepository()
-        app.state.case_repo = SupabaseCaseRepository()
+        app.state.case_repo = get_case_repo()
         logger.info("Repositories initialized")
     except Exception:
         # audit repo should always exist
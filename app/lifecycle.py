@@ -3,6 +3,7 @@ import logging
 from fastapi import FastAPI
 
 from app.dependencies import init_repositories
+from app.services.audit_queue import start_audit_worker, stop_audit_worker
 
 logger = logging.getLogger(__name__)
 
@@ -12,12 +13,16 @@ def register_lifecycle(app: FastAPI) -> None:
     def on_startup() -> None:
         logger.info("Application startup begin")
         init_repositories(app)
+        start_audit_worker()
         logger.info("Application startup completed")
 
     @app.on_event("shutdown")
     def on_shutdown() -> None:
         logger.info("Application shutdown begin")
 
+        # flush pending audit events before exit
+        stop_audit_worker()
+
         # Close connections if needed in future
         # e.g. app.state.db.close()
 
@@ -1,5 +1,10 @@
+import heapq
 from abc import ABC, abstractmethod
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Tuple
+
+from app.utils.currency_utils import extract_amount
+
+_HIGH_RISK = frozenset(("HIGH", "CRITICAL"))
 
 class CaseRepository(ABC):
     """
@@ -15,11 +20,119 @@ class CaseRepository(ABC):
         """List all cases for the portfolio view."""
         pass
 
+    def query_cases(
+        self,
+        *,
+        risk: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cards: bool = False,
+    ) -> Tuple[List[dict], int]:
+        """
+        Filtered, newest-first page of cases for the portfolio view.
+        Returns (rows, total_matching).
+
+        Filters are pre-normalized by the caller: risk/status upper-case,
+        search lower-case. Default implementation scans list_cases();
+        storage-backed repositories should push this into the store.
+
+        cards=True: caller only reads the portfolio card fields, so a store
+        may return a slim projection (same row shape, payload trimmed).
+        """
+        filtered = []
+
+        for r in self.list_cases():
+            payload = r.get("payload", {})
+
+            # Filter: Risk
+            r_risk = r.get("risk_level") or payload.get("risk_level", "LOW")
+            if risk and str(r_risk).upper() != risk:
+                continue
+
+            # Filter: Status
+            if status and str(r.get("status", "OPEN")).upper() != status:
+                continue
+
+            # Filter: Search (Smart Search covers PO, ID, Vendor)
+            # one lower() + one `in` over all fields; \x1f keeps a match from spanning two fields
+            if search:
+                haystack = "\x1f".join((
+                    r["case_id"],
+                    str(payload.get("vendor_name") or ""),
+                    str(payload.get("vendor_id") or ""),
+                    str(payload.get("vendor") or ""),
+                    str(payload.get("po_number") or ""),
+                )).lower()
+                if search not in haystack:
+                    continue
+
+            filtered.append(r)
+
+        # Newest first; created_at may be Null in DB
+        def newest(x):
+            return x.get("created_at") or ""
+
+        if limit is None:
+            filtered.sort(key=newest, reverse=True)
+            return filtered[offset:], len(filtered)
+
+        # only the first offset+limit rows are needed: O(N log k) instead of a full sort
+        top = heapq.nlargest(offset + limit, filtered, key=newest)
+        return top[offset:], len(filtered)
+
+    def case_stats(self) -> dict:
+        """
+        Portfolio aggregates: total_exposure, high_risk_count, open_cases.
+        Default implementation scans list_cases().
+        """
+        all_cases = self.list_cases()
+
+        total_exposure = 0
+        high_risk = 0
+
+        for c in all_cases:
+            payload = c.get("payload", {})
+
+            # ---- exposure (parsed once per row) ----
+            total_exposure += extract_amount(payload)
+
+            # ---- risk ----
+            if (c.get("risk_level") or payload.get("risk_level", "LOW")) in _HIGH_RISK:
+                high_risk += 1
+
+        return {
+            "total_exposure": total_exposure,
+            "high_risk_count": high_risk,
+            "open_cases": len(all_cases),
+        }
+
+    def cases_version(self) -> Tuple[int, str]:
+        """
+        Cheap change marker for the portfolio: (row count, newest updated_at).
+        Default implementation scans list_cases().
+        """
+        rows = self.list_cases()
+        return len(rows), max((r.get("updated_at") or "" for r in rows), default="")
+
     @abstractmethod
     def get_case(self, case_id: str) -> Optional[dict]:
         """Retrieve a single case payload by ID."""
         pass
 
+    def get_case_with_metadata(self, case_id: str) -> Tuple[Optional[dict], dict]:
+        """
+        (case payload, metadata row) for a decision run; (None, {}) when not found.
+        Default implementation: get_case() + get_case_metadata() when the store has it;
+        storage-backed repositories should fetch both in one query.
+        """
+        case = self.get_case(case_id)
+        if case is None:
+            return None, {}
+        get_metadata = getattr(self, "get_case_metadata", None)
+        return case, (get_metadata(case_id) if get_metadata else {})
+
     @abstractmethod
     def save_case(self, case: dict) -> None:
         """Create or Upsert a case payload."""
@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from uuid import UUID
 
@@ -13,6 +13,30 @@ from app.repositories.base_ingestion import IngestionRepository
 from app.db.supabase_client import supabase
 
 
+# business payload fields the portfolio list renders
+_CARD_FIELDS = (
+    "vendor_name", "vendor_id", "vendor",
+    "amount_total", "amount",
+    "pending_reason", "priority_score", "priority_reason",
+    "risk_level",
+)
+
+# card projection: a few JSON paths instead of the whole payload JSONB
+_CARD_SELECT = ", ".join((
+    "case_id, domain, status, created_at, risk_level",
+    # stored case record values win over the columns (same as _to_item)
+    "rec_domain:payload->domain",
+    "rec_status:payload->status",
+    "rec_created_at:payload->created_at",
+    "rec_risk_level:payload->risk_level",
+    *(f"biz_{k}:payload->payload->{k}" for k in _CARD_FIELDS),
+))
+
+
+# case metadata kept across a decision run's save (policy ref read from the stored record)
+_METADATA_SELECT = "case_id, domain, created_at, status, payload->policy_id, payload->policy_version"
+
+
 class SupabaseCaseRepository(CaseRepository):
     """
     Supabase (Postgres) implementation of CaseRepository
@@ -26,25 +50,134 @@ class SupabaseCaseRepository(CaseRepository):
         res = (
             supabase
             .table("cases")
-            .select("case_id, domain, status, created_at, payload")
+            .select("case_id, domain, status, created_at, risk_level, payload")
             .execute()
         )
 
-        items: List[dict] = []
+        return [self._to_item(r) for r in (res.data or [])]
+
+    @staticmethod
+    def _to_item(r: dict) -> dict:
+        payload = r.get("payload") or {}
+
+        # Ensure required metadata exists in payload
+        payload.setdefault("case_id", r.get("case_id"))
+        payload.setdefault("domain", r.get("domain"))
+        payload.setdefault("status", r.get("status"))
+        payload.setdefault("created_at", r.get("created_at"))
+        payload.setdefault("risk_level", r.get("risk_level"))
+
+        return payload
+
+    @staticmethod
+    def _card_to_item(r: dict) -> dict:
+        def rec(k: str) -> Any:
+            v = r.get(f"rec_{k}")
+            return v if v is not None else r.get(k)
+
+        return {
+            "case_id": r.get("case_id"),
+            "domain": rec("domain"),
+            "status": rec("status"),
+            "created_at": rec("created_at"),
+            "risk_level": rec("risk_level"),
+            "payload": {
+                k: r[f"biz_{k}"] for k in _CARD_FIELDS if r.get(f"biz_{k}") is not None
+            },
+        }
 
-        for r in (res.data or []):
-            payload = r.get("payload") or {}
+    # -------------------------
+    # Query cases (portfolio: filter + sort + page in Postgres)
+    # -------------------------
+    def query_cases(
+        self,
+        *,
+        risk: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cards: bool = False,
+    ) -> Tuple[List[dict], int]:
+        # Business payload is nested: cases.payload = case record, case.payload = business data
+        biz = "payload->payload->>"
+
+        columns = _CARD_SELECT if cards else "case_id, domain, status, created_at, risk_level, payload"
+        q = (
+            supabase
+            .table("cases")
+            .select(columns, count="exact")
+        )
 
-            # Ensure required metadata exists in payload
-            payload.setdefault("case_id", r.get("case_id"))
-            payload.setdefault("domain", r.get("domain"))
-            payload.setdefault("status", r.get("status"))
-            payload.setdefault("created_at", r.get("created_at"))
-            payload.setdefault("risk_level", r.get("risk_level"))
+        # OR-groups that must all hold; PostgREST takes a single `or` param
+        any_of: List[str] = []
+
+        if risk:
+            if risk == "LOW":
+                # read-model default: missing risk_level counts as LOW
+                any_of.append("risk_level.eq.LOW,risk_level.is.null")
+            else:
+                q = q.eq("risk_level", risk)
+
+        if status:
+            # exact match (ilike would treat % / _ in the filter as wildcards)
+            q = q.eq("status", status.upper())
+
+        if search:
+            # LIKE escape first (\ % _ are literal), then PostgREST quoting (\ ")
+            like = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            term = like.replace("\\", "\\\\").replace('"', '\\"')
+            any_of.append(",".join(
+                f'{col}.ilike."*{term}*"'
+                for col in (
+                    "case_id",
+                    f"{biz}vendor_name",
+                    f"{biz}vendor_id",
+                    f"{biz}vendor",
+                    f"{biz}po_number",
+                )
+            ))
+
+        if len(any_of) == 1:
+            q = q.or_(any_of[0])
+        elif any_of:
+            q = q.or_("and(" + ",".join(f"or({g})" for g in any_of) + ")")
+
+        q = q.order("created_at", desc=True, nullsfirst=False)
+        if limit is not None:
+            q = q.range(offset, offset + limit - 1)
+
+        res = q.execute()
+        to_item = self._card_to_item if cards else self._to_item
+        rows = [to_item(r) for r in (res.data or [])]
+        return rows, res.count if res.count is not None else len(rows)
 
-            items.append(payload)
+    # -------------------------
+    # Portfolio stats (aggregated in Postgres)
+    # -------------------------
+    def case_stats(self) -> dict:
+        res = supabase.rpc("case_stats", {}).execute()
+        row = (res.data or [{}])[0] if isinstance(res.data, list) else (res.data or {})
+        return {
+            "total_exposure": float(row.get("total_exposure") or 0),
+            "high_risk_count": int(row.get("high_risk_count") or 0),
+            "open_cases": int(row.get("open_cases") or 0),
+        }
 
-        return items
+    # -------------------------
+    # Portfolio change marker (one row + count, no payloads)
+    # -------------------------
+    def cases_version(self) -> Tuple[int, str]:
+        res = (
+            supabase
+            .table("cases")
+            .select("updated_at", count="exact")
+            .order("updated_at", desc=True, nullsfirst=False)
+            .limit(1)
+            .execute()
+        )
+        newest = (res.data or [{}])[0].get("updated_at") or ""
+        return (res.count or 0), newest
 
     # -------------------------
     # Get single case
@@ -76,7 +209,7 @@ class SupabaseCaseRepository(CaseRepository):
             res = (
                 supabase 
                 .table("cases")
-                .select("case_id, domain, created_at, status, payload->policy_id, payload->policy_version")
+                .select(_METADATA_SELECT)
                 .eq("case_id", case_id)
                 .maybe_single()
                 .execute()
@@ -86,21 +219,45 @@ class SupabaseCaseRepository(CaseRepository):
             print(f"Repo Error (Get Metadata): {e}")
             return {}
         
+    def get_case_with_metadata(self, case_id: str) -> Tuple[Optional[dict], dict]:
+        """
+        get_case + get_case_metadata in one round trip (same payload / metadata shapes)
+        """
+        res = (
+            supabase
+            .table("cases")
+            .select("payload, " + _METADATA_SELECT)
+            .eq("case_id", case_id)
+            .maybe_single()
+            .execute()
+        )
+
+        if not res or not res.data:
+            return None, {}
+
+        metadata = dict(res.data)
+        case = metadata.pop("payload", None)
+        if not case:
+            return None, {}
+        return case, metadata
+
     # -------------------------
     # Save / upsert case
     # -------------------------
     def save_case(self, case: dict) -> None:
         now = datetime.utcnow().isoformat()
 
-        supabase.table("cases").upsert(
-            {
-                "case_id": case["case_id"],
-                "domain": case.get("domain"),
-                "status": case.get("status"),
-                "payload": case,
-                "updated_at": now,
-            }
-        ).execute()
+        record = {
+            "case_id": case["case_id"],
+            "domain": case.get("domain"),
+            "status": case.get("status"),
+            "payload": case,
+            # materialized read-model column; always written -> no null on insert, no stale value on update
+            "risk_level": case.get("risk_level") or "LOW",
+            "updated_at": now,
+        }
+
+        supabase.table("cases").upsert(record).execute()
 
     # -------------------------
     # Update case status (Phase 5)
@@ -0,0 +1,84 @@
+# app/services/audit_queue.py
+import logging
+import queue
+import threading
+from typing import List, Optional
+
+from app.db.supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = "audit_events"
+MAX_BATCH = 500
+
+AUDIT_Q: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=10000)
+
+_STOP = None  # shutdown sentinel (FIFO -> everything queued before it is flushed first)
+_worker: Optional[threading.Thread] = None
+
+
+def _flush(batch: List[dict]) -> None:
+    try:
+        supabase.table(AUDIT_TABLE).insert(batch).execute()
+    except Exception:
+        logger.exception("Audit batch insert failed (%d events)", len(batch))
+
+
+def _run() -> None:
+    stopping = False
+    while not stopping:
+        item = AUDIT_Q.get()
+        if item is _STOP:
+            break
+
+        # drain whatever else is already waiting -> one INSERT per batch
+        batch = [item]
+        while len(batch) < MAX_BATCH:
+            try:
+                item = AUDIT_Q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+
+        _flush(batch)
+
+
+def is_running() -> bool:
+    return _worker is not None and _worker.is_alive()
+
+
+def enqueue(record: dict) -> bool:
+    """
+    Hand an audit row to the background writer.
+    Returns False when the worker is not running or the queue is full
+    (caller should write synchronously instead).
+    """
+    if not is_running():
+        return False
+    try:
+        AUDIT_Q.put_nowait(record)
+        return True
+    except queue.Full:
+        return False
+
+
+def start_audit_worker() -> None:
+    global _worker
+    if is_running():
+        return
+    _worker = threading.Thread(target=_run, name="audit-writer", daemon=True)
+    _worker.start()
+    logger.info("Audit writer started")
+
+
+def stop_audit_worker(timeout: float = 10.0) -> None:
+    global _worker
+    if not is_running():
+        return
+    AUDIT_Q.put(_STOP)
+    _worker.join(timeout)
+    _worker = None
+    logger.info("Audit writer stopped")
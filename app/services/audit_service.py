@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import List
 
 from app.db.supabase_client import supabase
+from app.services.audit_queue import enqueue
 
 
 
@@ -18,6 +19,16 @@ class AuditService:
     - created_at
     """
 
+    @staticmethod
+    def _record(event_type: str, payload: dict, actor: str, created_at: str = None) -> dict:
+        return {
+            "case_id": payload.get("case_id"),
+            "event_type": event_type,
+            "actor": actor,
+            "payload": payload,
+            "created_at": created_at or datetime.utcnow().isoformat(),
+        }
+
     @staticmethod
     def write(
         event_type: str,
@@ -28,17 +39,16 @@ class AuditService:
         Persist audit event to Supabase
 
         Note:
+        - Queued to the background audit writer when it is running
+          (batched INSERT, off the request path); otherwise written inline
         - Supabase Python SDK v2+ throws exception on failure
         - No `result.error` attribute anymore
         """
 
-        record = {
-            "case_id": payload.get("case_id"),
-            "event_type": event_type,
-            "actor": actor,
-            "payload": payload,
-            "created_at": datetime.utcnow().isoformat(),
-        }
+        record = AuditService._record(event_type, payload, actor)
+
+        if enqueue(record):
+            return record
 
         result = (
             supabase
@@ -56,15 +66,45 @@ class AuditService:
         return record
 
     @staticmethod
-    def list_by_case(case_id: str) -> List[dict]:
+    def write_many(events: List[dict]) -> List[dict]:
+        """
+        Persist several audit events in one round-trip
+
+        events: [{"event_type": ..., "payload": {...}, "actor": "SYSTEM"}, ...]
+        (order is kept; created_at is stamped per event unless the event carries one)
+        """
+
+        records = [
+            AuditService._record(
+                e["event_type"], e["payload"], e.get("actor", "SYSTEM"), e.get("created_at")
+            )
+            for e in events
+        ]
+
+        # anything the background writer cannot take goes out as one INSERT
+        pending = [r for r in records if not enqueue(r)]
+        if pending:
+            (
+                supabase
+                .table("audit_events")
+                .insert(pending)
+                .execute()
+            )
+
+        return records
+
+    @staticmethod
+    def list_by_case(case_id: str, projection: str = "*") -> List[dict]:
         """
         Read audit timeline for a case
+
+        projection: PostgREST column list (default all columns)
         """
 
         result = (
             supabase
             .table("audit_events")
-            .select("*")
+            .select(projection)
             .eq("case_id", case_id)
             .order("created_at", desc=False)
             .execute()
@@ -0,0 +1,28 @@
+# app/services/case_version.py
+import time
+from typing import Dict, Tuple
+
+from app.repositories.base import CaseRepository
+
+# portfolio change marker (case count, newest updated_at) behind the case-list ETag,
+# probed at most once per TTL while clients poll
+_VERSION_TTL = 2.0
+_version_cache: Dict[int, Tuple[float, Tuple[int, str]]] = {}
+
+
+def cases_version(case_repo: CaseRepository) -> Tuple[int, str]:
+    now = time.monotonic()
+    hit = _version_cache.get(id(case_repo))
+    if hit and now - hit[0] < _VERSION_TTL:
+        return hit[1]
+    version = case_repo.cases_version()
+    _version_cache[id(case_repo)] = (now, version)
+    return version
+
+
+def invalidate_cases_version() -> None:
+    """
+    Call after a case write (ingest, decision run): list ETags must change now,
+    not after the TTL
+    """
+    _version_cache.clear()
@@ -1,4 +1,5 @@
 import json
+from app.utils.json_utils import ndjson_line
 import os
 import asyncio
 from typing import AsyncGenerator, List, Dict
@@ -219,9 +220,9 @@ class CopilotAgent:
     # ------------------------------------------------------------------
     # Helper Methods
     # ------------------------------------------------------------------
-    def _format_event(self, event_type: str, data: dict) -> str:
+    def _format_event(self, event_type: str, data: dict) -> bytes:
         """Format data as Server-Sent Events (JSON line)"""
-        return json.dumps({"type": event_type, "data": data}) + "\n"
+        return ndjson_line({"type": event_type, "data": data})
 
     def _analyze_price_variance(self, line_items: list, vendor_name: str) -> dict:
         """
@@ -5,6 +5,7 @@ from openai import OpenAI
 
 # Import Supabase client เพื่อใช้บันทึก Audit Log
 from app.db.supabase_client import supabase
+from app.utils.json_utils import ndjson_line
 # ตรวจสอบ path ให้ตรงกับที่คุณเก็บไฟล์ repository
 from app.repositories.rag_repo import CopilotRepositoryAgent
 
@@ -346,7 +347,7 @@ EVIDENCE (Contract & Price Database):
         except Exception as e:
             print(f"⚠️ Failed to save audit log: {e}")
 
-    def _trace(self, step_id: int, title: str, status: str, desc: str, history_log: List = None) -> str:
+    def _trace(self, step_id: int, title: str, status: str, desc: str, history_log: List = None) -> bytes:
         data = {
             "step_id": step_id,
             "title": title,
@@ -360,11 +361,10 @@ EVIDENCE (Contract & Price Database):
             
         return self._event("trace", data)
 
-    def _event(self, event_type: str, data: dict) -> str:
-        return json.dumps(
+    def _event(self, event_type: str, data: dict) -> bytes:
+        return ndjson_line(
             {
                 "type": event_type,
                 "data": data,
-            },
-            ensure_ascii=False,
-        ) + "\n"
\ No newline at end of file
+            }
+        )
\ No newline at end of file
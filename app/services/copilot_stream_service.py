@@ -1,6 +1,7 @@
-import os, json
+import os
 from openai import OpenAI
 from app.repositories.copilot_repo import CopilotRepository
+from app.utils.json_utils import ndjson_line
 
 class CopilotStreamService:
     def __init__(self):
@@ -70,4 +71,4 @@ Answer ONLY from evidence below.
         })
 
     def _evt(self, t: str, data: dict):
-        return json.dumps({"type": t, "data": data}) + "\n"
+        return ndjson_line({"type": t, "data": data})
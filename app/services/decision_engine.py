@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Dict, List, TypedDict, Optional, Any
+import operator
+from typing import Callable, Dict, List, TypedDict, Optional, Any
 
 
 # ============================================================
@@ -53,14 +54,10 @@ class EvaluateRulesNode(Node):
             hit = True
             matched: List[Dict] = []
 
-            for cond in rule.get("when", []):
-                field = cond["field"]
-                operator = cond["operator"]
-                expected = cond["value"]
-
+            for field, operator, expected, compare in _compiled_conditions(rule):
                 actual = inputs.get(field)
 
-                ok = _safe_compare(actual, operator, expected)
+                ok = _check(compare, actual, expected)
 
                 if ok:
                     matched.append({
@@ -390,33 +387,48 @@ class DecisionEngine:
 # Helpers
 # ============================================================
 
-def _safe_compare(actual: Any, operator: str, expected: Any) -> bool:
-    if actual is None:
+# operator string -> comparison (actual, expected), resolved once at import
+_OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda actual, expected: actual in expected,
+    "not_in": lambda actual, expected: actual not in expected,
+    "contains": operator.contains,
+}
+
+
+def _compiled_conditions(rule: Dict) -> List[tuple]:
+    """
+    rule["when"] as (field, operator, expected, compare fn),
+    resolved once per (cached) rule dict
+    """
+    compiled = rule.get("_compiled_conditions")
+    if compiled is None:
+        compiled = [
+            (c["field"], c["operator"], c["value"], _OPS.get(c["operator"]))
+            for c in rule.get("when", [])
+        ]
+        rule["_compiled_conditions"] = compiled
+    return compiled
+
+
+def _check(compare: Optional[Callable[[Any, Any], Any]], actual: Any, expected: Any) -> bool:
+    # unknown operator / missing input / incomparable types -> not matched
+    if actual is None or compare is None:
         return False
 
     try:
-        if operator == ">":
-            return actual > expected
-        if operator == ">=":
-            return actual >= expected
-        if operator == "<":
-            return actual < expected
-        if operator == "<=":
-            return actual <= expected
-        if operator == "==":
-            return actual == expected
-        if operator == "!=":
-            return actual != expected
-        if operator == "in":
-            return actual in expected
-        if operator == "not_in":
-            return actual not in expected
-        if operator == "contains":
-            return expected in actual
+        return compare(actual, expected)
     except TypeError:
         return False
 
-    return False
+
+def _safe_compare(actual: Any, op: str, expected: Any) -> bool:
+    return _check(_OPS.get(op), actual, expected)
 
 
 def _derive_required_role(policy: Dict, inputs: Dict) -> str:
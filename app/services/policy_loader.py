@@ -1,6 +1,12 @@
 from pathlib import Path
 import yaml
 
+# libyaml C loader when available (much faster parse), pure-Python fallback
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 POLICY_DIR = BASE_DIR / "policies"
 
@@ -27,8 +33,7 @@ class PolicyLoader:
         if not policy_path.exists():
             raise FileNotFoundError(f"Policy file not found: {filename}")
 
-        with open(policy_path, "r") as f:
-            policy = yaml.safe_load(f)
+        policy = yaml.load(policy_path.read_bytes(), Loader=_YamlLoader)
 
         policy["_meta"] = {
             "policy_id": policy["policy_id"],
@@ -0,0 +1,8 @@
+import os
+
+# app modules build the Supabase client / Settings at import time;
+# tests never reach the network, they only need the variables to exist
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("LLAMA_CLOUD_API_KEY", "test-llama-key")
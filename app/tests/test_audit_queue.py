@@ -0,0 +1,120 @@
+import queue
+import threading
+
+import pytest
+
+from app.services import audit_queue
+
+# -------------------------------------------------
+# Stub Supabase client (records every INSERT batch)
+# -------------------------------------------------
+
+class FakeInsert:
+    def __init__(self, client, table, rows):
+        self.client, self.table, self.rows = client, table, rows
+
+    def execute(self):
+        self.client.inserts.append((self.table, list(self.rows)))
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client, self.name = client, name
+
+    def insert(self, rows):
+        return FakeInsert(self.client, self.name, rows)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.inserts = []
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(audit_queue, "supabase", fake)
+    monkeypatch.setattr(audit_queue, "AUDIT_Q", queue.Queue(maxsize=100))
+    monkeypatch.setattr(audit_queue, "MAX_BATCH", 3)
+    yield fake
+    audit_queue.stop_audit_worker()
+
+
+def inserted(client):
+    return [row for _, batch in client.inserts for row in batch]
+
+
+# -------------------------------------------------
+# Tests
+# -------------------------------------------------
+
+def test_enqueue_refused_while_worker_stopped(client):
+    assert not audit_queue.is_running()
+    assert audit_queue.enqueue({"id": 1}) is False
+    assert audit_queue.AUDIT_Q.empty()
+
+
+def test_enqueue_refused_when_queue_full(client, monkeypatch):
+    # a live "worker" that never drains -> the queue fills up
+    release = threading.Event()
+    idle = threading.Thread(target=release.wait, daemon=True)
+    idle.start()
+    monkeypatch.setattr(audit_queue, "_worker", idle)
+    monkeypatch.setattr(audit_queue, "AUDIT_Q", queue.Queue(maxsize=1))
+
+    assert audit_queue.enqueue({"id": 1}) is True
+    assert audit_queue.enqueue({"id": 2}) is False
+
+    release.set()
+    idle.join()
+
+
+def test_stop_drains_every_queued_event(client):
+    audit_queue.start_audit_worker()
+    events = [{"id": i} for i in range(10)]
+    assert all(audit_queue.enqueue(e) for e in events)
+
+    audit_queue.stop_audit_worker()
+
+    assert not audit_queue.is_running()
+    assert inserted(client) == events
+    assert {table for table, _ in client.inserts} == {audit_queue.AUDIT_TABLE}
+
+
+def test_waiting_events_are_inserted_in_batches_up_to_max(client):
+    # queued before the worker starts -> the first get() finds a backlog to batch
+    events = [{"id": i} for i in range(7)]
+    for e in events:
+        audit_queue.AUDIT_Q.put(e)
+
+    audit_queue.start_audit_worker()
+    audit_queue.stop_audit_worker()
+
+    assert inserted(client) == events
+    assert [len(batch) for _, batch in client.inserts] == [3, 3, 1]
+
+
+def test_failed_insert_does_not_stop_the_worker(client, monkeypatch):
+    calls = []
+
+    class FlakyInsert(FakeInsert):
+        def execute(self):
+            calls.append(len(self.rows))
+            if len(calls) == 1:
+                raise RuntimeError("db down")
+            super().execute()
+
+    monkeypatch.setattr(FakeTable, "insert", lambda self, rows: FlakyInsert(self.client, self.name, rows))
+
+    audit_queue.AUDIT_Q.put({"id": 0})
+    audit_queue.start_audit_worker()
+    # wait for the failing batch before queueing the next one
+    while not calls:
+        threading.Event().wait(0.01)
+    assert audit_queue.enqueue({"id": 1}) is True
+    audit_queue.stop_audit_worker()
+
+    assert inserted(client) == [{"id": 1}]
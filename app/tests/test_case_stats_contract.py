@@ -0,0 +1,139 @@
+"""
+base.CaseRepository.case_stats (Python) and the case_stats() RPC
+(005_add_cases_risk_level.sql) must agree on the same rows.
+No Postgres here: the SQL extract_amount() steps are mirrored below and the
+numeric regex is read straight from the migration.
+"""
+import re
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from app.repositories.base import CaseRepository
+
+_MIGRATION = Path(__file__).resolve().parents[1] / "db" / "migrations" / "005_add_cases_risk_level.sql"
+_SQL = _MIGRATION.read_text(encoding="utf-8")
+_SQL_NUMERIC_RE = re.compile(re.search(r"s ~ '([^']+)'", _SQL).group(1))
+
+# (payload amount fields, risk_level column) — same fixtures for both sides
+ROWS = [
+    ({"amount_total": 1000}, "HIGH"),
+    ({"amount_total": "1,000.50"}, None),
+    ({"amount_total": 0, "amount": 250}, "LOW"),          # 0 falls through to amount
+    ({"amount_total": 0.0, "amount": "12"}, None),
+    ({"amount_total": "0", "amount": 999}, None),         # '0' is truthy -> 0, no fall-through
+    ({"amount_total": "", "amount": "300"}, "CRITICAL"),
+    ({"amount_total": None, "amount": " 1000 "}, None),
+    ({"amount_total": False, "amount": "7"}, None),
+    ({"amount": "+5"}, None),
+    ({"amount": "1e3"}, None),
+    ({"amount": "-2.5E-1"}, None),
+    ({"amount": "1_000"}, None),
+    ({"amount": ".5"}, None),
+    ({"amount": "1."}, None),
+    ({"amount": "\t42\n"}, None),
+    ({"amount": "abc"}, None),
+    ({"amount": "1__0"}, None),
+    ({"amount": "_1"}, None),
+    ({"amount": "1 000"}, None),
+    ({"amount": True}, None),
+    ({"amount": [1]}, None),
+    ({"amount": {"x": 1}}, None),
+    ({"amount": -20.5}, None),
+    ({"risk_level": "HIGH"}, None),                       # payload fallback for risk
+    ({"risk_level": "HIGH"}, ""),
+    ({}, None),
+]
+
+
+class ListRepo(CaseRepository):
+    def __init__(self, rows):
+        self._rows = rows
+
+    def list_cases(self):
+        return self._rows
+
+    def get_case(self, case_id):
+        return None
+
+    def save_case(self, case):
+        pass
+
+    def update_case_status(self, case_id, status):
+        pass
+
+    def get_audit_logs(self, case_id):
+        return []
+
+    def search_evidence(self, query_embedding, match_count=3):
+        return []
+
+
+def _jsonb_type(v):
+    if v is None:
+        return "null"
+    if isinstance(v, bool):
+        return "boolean"
+    if isinstance(v, (int, float)):
+        return "number"
+    if isinstance(v, str):
+        return "string"
+    return "array" if isinstance(v, list) else "object"
+
+
+def sql_extract_amount(p: dict) -> Decimal:
+    """Step-for-step mirror of extract_amount(jsonb) in the migration."""
+    for key in ("amount_total", "amount"):
+        v = p.get(key)
+        t = _jsonb_type(v)
+        if v is None or v is False or v in ("", [], {}):
+            continue
+        if t == "number" and v == 0:
+            continue
+        if t == "number":
+            return Decimal(str(v))
+        if t == "boolean":
+            return Decimal(1)
+        if t == "string":
+            s = v.replace(",", "").strip(" \t\n\r\f\v")
+            if _SQL_NUMERIC_RE.search(s):
+                return Decimal(s.replace("_", ""))
+        return Decimal(0)
+    return Decimal(0)
+
+
+def sql_case_stats(rows) -> dict:
+    return {
+        "total_exposure": sum((sql_extract_amount(r["payload"]) for r in rows), Decimal(0)),
+        "high_risk_count": sum(
+            1 for r in rows
+            if ((r["risk_level"] or None) or r["payload"].get("risk_level") or "LOW") in ("HIGH", "CRITICAL")
+        ),
+        "open_cases": len(rows),
+    }
+
+
+def _rows():
+    return [{"case_id": f"C-{i}", "payload": p, "risk_level": rl} for i, (p, rl) in enumerate(ROWS)]
+
+
+def test_sql_case_stats_matches_base_repo():
+    rows = _rows()
+    py = ListRepo(rows).case_stats()
+    sql = sql_case_stats(rows)
+
+    assert py["open_cases"] == sql["open_cases"] == len(ROWS)
+    assert py["high_risk_count"] == sql["high_risk_count"]
+    assert py["total_exposure"] == pytest.approx(float(sql["total_exposure"]))
+
+
+@pytest.mark.parametrize("payload, _risk", ROWS)
+def test_sql_extract_amount_matches_python_per_row(payload, _risk):
+    from app.utils.currency_utils import extract_amount
+
+    assert extract_amount(payload) == pytest.approx(float(sql_extract_amount(payload)))
+
+
+def test_case_stats_reads_extract_amount():
+    assert "sum(extract_amount(payload->'payload'))" in _SQL
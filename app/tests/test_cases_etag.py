@@ -0,0 +1,180 @@
+import copy
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.cases import router as cases_router
+from app.api import demo
+from app.api.decisions import router as decisions_router
+from app.services import case_version, decision_runner
+from app.services.audit_service import AuditService
+
+# -------------------------------------------------
+# In-memory case repo (stored case records, Supabase shape)
+# -------------------------------------------------
+
+CASES = [
+    {
+        "case_id": "CASE-1",
+        "domain": "procurement",
+        "status": "OPEN",
+        "risk_level": "LOW",
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+        "payload": {"vendor_name": "Acme", "amount_total": 350000},
+    },
+]
+
+
+class FakeCaseRepo:
+    def __init__(self, cases):
+        self.cases = {c["case_id"]: copy.deepcopy(c) for c in cases}
+        self.version_probes = 0
+
+    def get_case(self, case_id):
+        return self.cases.get(case_id)
+
+    def get_case_with_metadata(self, case_id):
+        case = self.cases.get(case_id)
+        return (copy.deepcopy(case), {}) if case else (None, {})
+
+    def save_case(self, case):
+        self.cases[case["case_id"]] = case
+
+    def cases_version(self):
+        self.version_probes += 1
+        return len(self.cases), max(c.get("updated_at") or "" for c in self.cases.values())
+
+    def query_cases(self, *, risk=None, status=None, search=None, offset=0, limit=None, cards=False):
+        rows = sorted(self.cases.values(), key=lambda c: c["created_at"], reverse=True)
+        return rows[offset:offset + limit], len(rows)
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    monkeypatch.setattr(AuditService, "write", staticmethod(lambda *a, **k: {}))
+    monkeypatch.setattr(decision_runner.AuditService, "write_many", staticmethod(lambda events: []))
+    # long TTL: an ETag may only change because a write invalidated the version
+    monkeypatch.setattr(case_version, "_VERSION_TTL", 3600.0)
+    case_version.invalidate_cases_version()
+    return FakeCaseRepo(CASES)
+
+
+@pytest.fixture
+def client(repo):
+    app = FastAPI()
+    app.include_router(cases_router, prefix="/cases")
+    app.include_router(decisions_router, prefix="/decisions")
+    app.include_router(demo.router)
+    app.state.case_repo = repo
+    return TestClient(app)
+
+
+# -------------------------------------------------
+# Case list
+# -------------------------------------------------
+
+def test_list_sends_etag_then_304(client):
+    first = client.get("/cases")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.json()["items"][0]["id"] == "CASE-1"
+
+    again = client.get("/cases", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_list_etag_match_is_weak_and_accepts_lists(client):
+    etag = client.get("/cases").headers["ETag"]
+    strong = etag.removeprefix("W/")
+
+    assert client.get("/cases", headers={"If-None-Match": strong}).status_code == 304
+    assert client.get("/cases", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get("/cases", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/cases", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_list_etag_depends_on_query(client):
+    etag = client.get("/cases").headers["ETag"]
+    other = client.get("/cases", params={"page": 2}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_list_version_probed_once_per_ttl(client, repo, monkeypatch):
+    client.get("/cases")
+    client.get("/cases")
+    assert repo.version_probes == 1
+
+    monkeypatch.setattr(case_version, "_VERSION_TTL", 0.0)
+    client.get("/cases")
+    assert repo.version_probes == 2
+
+
+def test_ingest_changes_list_etag(client):
+    etag = client.get("/cases").headers["ETag"]
+
+    res = client.post("/cases/ingest", json={"case_id": "CASE-2", "payload": {"vendor_name": "Beta", "amount": 10}})
+    assert res.status_code == 200
+
+    after = client.get("/cases", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert after.json()["total"] == 2
+
+
+def test_decision_run_changes_list_etag(client, repo):
+    etag = client.get("/cases").headers["ETag"]
+
+    res = client.post("/decisions/run", json={
+        "case_id": "CASE-1", "policy_id": "PROCUREMENT-001", "policy_version": "v3.1",
+    })
+    assert res.status_code == 200
+    assert repo.cases["CASE-1"]["status"] == "EVALUATED"
+
+    # saved by the background task -> the cached version was dropped with it
+    after = client.get("/cases", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert after.json()["items"][0]["status"] == "EVALUATED"
+
+
+def test_demo_load_changes_list_etag(client, repo, monkeypatch):
+    etag = client.get("/cases").headers["ETag"]
+
+    seeded = dict(CASES[0], case_id="CASE-DEMO", updated_at="2025-02-01T00:00:00")
+    monkeypatch.setattr(demo, "seed_demo_data", lambda audit_repo=None: {"cases": [seeded]})
+    client.app.state.audit_repo = type("A", (), {"append_event": lambda self, **kw: None})()
+
+    assert client.post("/demo/load").status_code == 200
+
+    after = client.get("/cases", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert after.json()["total"] == 2
+
+
+# -------------------------------------------------
+# Case detail
+# -------------------------------------------------
+
+def test_detail_sends_etag_then_304_until_case_changes(client, repo):
+    first = client.get("/cases/CASE-1")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    assert client.get("/cases/CASE-1", headers={"If-None-Match": etag}).status_code == 304
+
+    repo.cases["CASE-1"] = dict(repo.cases["CASE-1"], status="EVALUATED", risk_level="HIGH")
+    changed = client.get("/cases/CASE-1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["status"] == "EVALUATED"
+
+
+def test_detail_missing_case_is_404(client):
+    assert client.get("/cases/NOPE").status_code == 404
@@ -0,0 +1,117 @@
+import pytest
+
+from app.core.config import settings
+from app.services import decision_runner
+from app.services.decision_runner import execute_decision_run
+
+# -------------------------------------------------
+# Shared mock policy
+# -------------------------------------------------
+
+MOCK_POLICY = {
+    "rules": [
+        {
+            "id": "HIGH_AMOUNT_ESCALATION",
+            "description": "High value procurement (>200k) must be escalated",
+            "risk_impact": "HIGH",
+            "when": [
+                {"field": "amount_total", "operator": ">", "value": 200000}
+            ]
+        },
+        {
+            "id": "VENDOR_BLACKLIST_CHECK",
+            "description": "Critical: Vendor is flagged as BLACKLISTED",
+            "risk_impact": "CRITICAL",
+            "when": [
+                {"field": "vendor_status", "operator": "==", "value": "BLACKLISTED"}
+            ]
+        }
+    ],
+}
+
+
+class FakeCaseRepo:
+    def __init__(self):
+        self.saved = []
+
+    def save_case(self, case):
+        self.saved.append(case)
+
+
+@pytest.fixture
+def audit_events(monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        decision_runner.AuditService, "write_many", staticmethod(lambda events: written.extend(events))
+    )
+    return written
+
+
+def run(**kwargs):
+    case = {"case_id": "CASE-1", "payload": {"vendor_name": "Acme", "amount_total": "350,000"}}
+    repo = FakeCaseRepo()
+    execution = execute_decision_run(
+        case=case,
+        policy=MOCK_POLICY,
+        policy_id="TEST",
+        policy_version="v1",
+        repo=repo,
+        **kwargs,
+    )
+    return execution, repo
+
+
+def rule(execution, rule_id):
+    return next(r for r in execution["rule_results"] if r["rule_id"] == rule_id)
+
+
+def rule_events(events):
+    return {e["payload"]["rule"]["id"]: e["payload"] for e in events if e["event_type"] == "RULE_EVALUATED"}
+
+
+# -------------------------------------------------
+# Tests
+# -------------------------------------------------
+
+def test_verbose_audit_explains_each_condition(audit_events):
+    execution, repo = run(audit_verbose=True)
+
+    hit = rule(execution, "HIGH_AMOUNT_ESCALATION")
+    assert hit["hit"] is True
+    assert hit["inputs"] == {
+        "amount_total": "350,000.00 (Rule: > 200,000.00) -> ⚠️ Risk Detected (350,000.00 > 200,000.00)"
+    }
+
+    passed = rule(execution, "VENDOR_BLACKLIST_CHECK")
+    assert passed["hit"] is False
+    assert passed["inputs"] == {
+        "vendor_status": "ACTIVE (Rule: == BLACKLISTED) -> ✅ Pass (ACTIVE does NOT satisfy == BLACKLISTED)"
+    }
+
+    assert rule_events(audit_events)["HIGH_AMOUNT_ESCALATION"]["inputs"] == hit["inputs"]
+    assert repo.saved and repo.saved[0]["risk_level"] == "HIGH"
+
+
+def test_minimal_audit_keeps_only_rule_outcome(audit_events):
+    execution, repo = run(audit_verbose=False)
+
+    assert rule(execution, "HIGH_AMOUNT_ESCALATION")["inputs"] == {"Result": "Criteria Met"}
+    assert rule(execution, "VENDOR_BLACKLIST_CHECK")["inputs"] == {"Result": "Passed"}
+
+    events = rule_events(audit_events)
+    assert events["HIGH_AMOUNT_ESCALATION"]["inputs"] == {"Result": "Criteria Met"}
+    assert events["VENDOR_BLACKLIST_CHECK"]["inputs"] == {"Result": "Passed"}
+
+    # the decision itself does not depend on the audit detail level
+    assert execution["recommendation"] == run(audit_verbose=True)[0]["recommendation"]
+    assert repo.saved[0]["risk_level"] == "HIGH"
+
+
+def test_audit_verbose_defaults_to_settings_per_run(audit_events, monkeypatch):
+    monkeypatch.setattr(settings, "audit_verbose", False)
+    execution, _ = run()
+    assert rule(execution, "HIGH_AMOUNT_ESCALATION")["inputs"] == {"Result": "Criteria Met"}
+
+    monkeypatch.setattr(settings, "audit_verbose", True)
+    execution, _ = run()
+    assert "amount_total" in rule(execution, "HIGH_AMOUNT_ESCALATION")["inputs"]
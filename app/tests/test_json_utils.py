@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import responses
+from app.utils import json_utils
+from app.utils.json_utils import ndjson_line
+
+
+def test_ndjson_line_plain_record():
+    line = ndjson_line({"type": "token", "text": "สวัสดี"})
+    assert line.endswith(b"\n")
+    assert json.loads(line) == {"type": "token", "text": "สวัสดี"}
+
+
+@pytest.mark.parametrize("obj, expected", [
+    ({1: "a"}, {"1": "a"}),                      # non-str dict key
+    ({"n": 2 ** 70}, {"n": 2 ** 70}),            # int > 64-bit
+    ({"s": {1, 2}}, {"s": str({1, 2})}),        # unsupported type -> str
+])
+def test_ndjson_line_falls_back_to_stdlib(obj, expected):
+    line = ndjson_line(obj)
+    assert line.endswith(b"\n")
+    assert json.loads(line) == expected
+
+
+def test_ndjson_line_without_orjson(monkeypatch):
+    monkeypatch.setattr(json_utils, "orjson", None)
+    assert json.loads(json_utils.ndjson_line({"a": 1})) == {"a": 1}
+
+
+def test_std_json_response_encodes_datetimes():
+    from datetime import datetime
+
+    app = FastAPI(default_response_class=responses._StdJSONResponse)
+
+    @app.get("/x")
+    def x():
+        return responses._StdJSONResponse({"at": datetime(2025, 1, 2, 3, 4, 5)})
+
+    r = TestClient(app).get("/x")
+    assert r.status_code == 200
+    assert r.json() == {"at": "2025-01-02T03:04:05"}
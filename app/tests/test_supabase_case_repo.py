@@ -0,0 +1,165 @@
+import pytest
+
+from app.repositories import supabase_repo
+from app.repositories.supabase_repo import SupabaseCaseRepository
+
+# -------------------------------------------------
+# Stub Supabase client (records the PostgREST query chain)
+# -------------------------------------------------
+
+class FakeResult:
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, data, count):
+        self.calls = []
+        self._result = FakeResult(data, count)
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+    def execute(self):
+        return self._result
+
+    def called(self, name):
+        return [(args, kwargs) for n, args, kwargs in self.calls if n == name]
+
+
+class FakeSupabase:
+    def __init__(self, data=None, count=None):
+        self.query = FakeQuery(data or [], count)
+        self.tables = []
+
+    def table(self, name):
+        self.tables.append(name)
+        return self.query
+
+
+ROWS = [
+    {
+        "case_id": "CASE-2",
+        "domain": "procurement",
+        "status": "OPEN",
+        "created_at": "2025-01-02T00:00:00",
+        "risk_level": None,
+        "payload": {"case_id": "CASE-2", "payload": {"vendor_name": "Acme"}},
+    },
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeSupabase(data=[dict(r, payload=dict(r["payload"])) for r in ROWS], count=7)
+    monkeypatch.setattr(supabase_repo, "supabase", fake)
+    return fake
+
+
+# -------------------------------------------------
+# Tests
+# -------------------------------------------------
+
+def test_no_filters_sorts_newest_first_without_paging(client):
+    rows, total = SupabaseCaseRepository().query_cases()
+
+    q = client.query
+    assert client.tables == ["cases"]
+    assert q.called("select")[0][1] == {"count": "exact"}
+    assert q.called("order") == [(("created_at",), {"desc": True, "nullsfirst": False})]
+    assert q.called("range") == []
+    assert q.called("or_") == [] and q.called("eq") == []
+
+    # full record payload with metadata filled in from the columns
+    assert rows == [{
+        "case_id": "CASE-2",
+        "payload": {"vendor_name": "Acme"},
+        "domain": "procurement",
+        "status": "OPEN",
+        "created_at": "2025-01-02T00:00:00",
+        "risk_level": None,
+    }]
+    assert total == 7
+
+
+def test_page_maps_to_inclusive_range(client):
+    SupabaseCaseRepository().query_cases(offset=20, limit=10)
+    assert client.query.called("range") == [((20, 29), {})]
+
+
+def test_count_falls_back_to_row_count(monkeypatch):
+    monkeypatch.setattr(supabase_repo, "supabase", FakeSupabase(data=list(ROWS), count=None))
+    _, total = SupabaseCaseRepository().query_cases()
+    assert total == 1
+
+
+def test_risk_low_also_matches_missing_risk(client):
+    SupabaseCaseRepository().query_cases(risk="LOW")
+    assert client.query.called("or_") == [(("risk_level.eq.LOW,risk_level.is.null",), {})]
+    assert client.query.called("eq") == []
+
+
+def test_other_risk_is_exact_match(client):
+    SupabaseCaseRepository().query_cases(risk="HIGH")
+    assert client.query.called("eq") == [(("risk_level", "HIGH"), {})]
+    assert client.query.called("or_") == []
+
+
+def test_status_is_exact_upper_case_match(client):
+    SupabaseCaseRepository().query_cases(status="open_%")
+    assert client.query.called("eq") == [(("status", "OPEN_%"), {})]
+    assert client.query.called("ilike") == []
+
+
+def test_search_covers_id_and_vendor_fields_with_quoting(client):
+    SupabaseCaseRepository().query_cases(search='a"b\\c')
+
+    (args, _), = client.query.called("or_")
+    term = 'a\\"b\\\\\\\\c'  # LIKE-escaped backslash, then quoted
+    biz = "payload->payload->>"
+    assert args == (",".join((
+        f'case_id.ilike."*{term}*"',
+        f'{biz}vendor_name.ilike."*{term}*"',
+        f'{biz}vendor_id.ilike."*{term}*"',
+        f'{biz}vendor.ilike."*{term}*"',
+        f'{biz}po_number.ilike."*{term}*"',
+    )),)
+
+
+def test_search_escapes_like_wildcards(client):
+    SupabaseCaseRepository().query_cases(search="50%_off")
+
+    (args, _), = client.query.called("or_")
+    # \% / \_ for LIKE, each backslash doubled again inside the quoted value
+    assert args[0].startswith('case_id.ilike."*50\\\\%\\\\_off*",')
+
+
+def test_low_risk_and_search_are_both_required(client):
+    SupabaseCaseRepository().query_cases(risk="LOW", search="po-1")
+
+    (args, _), = client.query.called("or_")
+    assert args[0].startswith("and(or(risk_level.eq.LOW,risk_level.is.null),or(case_id.ilike.")
+    assert args[0].endswith(')')
+
+
+def test_cards_select_slim_projection(client):
+    SupabaseCaseRepository().query_cases(cards=True)
+    (args, _), = client.query.called("select")
+    assert "payload->payload->vendor_name" in args[0]
+    assert not args[0].endswith(", payload")
+
+
+@pytest.mark.parametrize("risk, expected", [("HIGH", "HIGH"), (None, "LOW"), ("", "LOW")])
+def test_save_case_always_writes_risk_level(client, risk, expected):
+    case = {"case_id": "CASE-9", "domain": "procurement", "status": "OPEN", "payload": {}}
+    if risk is not None:
+        case["risk_level"] = risk
+
+    SupabaseCaseRepository().save_case(case)
+
+    (args, _), = client.query.called("upsert")
+    assert args[0]["risk_level"] == expected
@@ -1,3 +1,5 @@
+from app.utils.dict_utils import pick
+
 def format_currency(amount: float, currency: str = "THB") -> str:
     """แปลง 387500 -> '387,500.00 THB'"""
     if amount is None: return "0.00 " + currency
@@ -7,4 +9,27 @@ def calculate_variance_pct(actual: float, expected: float) -> float:
     """คำนวณ % Diff ป้องกัน error div by zero"""
     if expected == 0:
         return 0.0 if actual == 0 else 100.0
-    return round(((actual - expected) / expected) * 100, 2)
\ No newline at end of file
+    return round(((actual - expected) / expected) * 100, 2)
+
+_NO_COMMA = str.maketrans("", "", ",")
+
+def to_float(x) -> float:
+    """แปลงยอดเงินเป็น float: int/float ผ่านตรง, '1,000' -> 1000.0, ค่าเสีย -> 0.0"""
+    t = type(x)
+    if t is float:
+        return x
+    if t is int:
+        return float(x)
+    if t is str:
+        try:
+            return float(x.translate(_NO_COMMA))
+        except ValueError:
+            return 0.0
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return 0.0
+
+def extract_amount(payload: dict) -> float:
+    """ดึงยอดเงินจาก payload (amount_total -> amount) แปลงเป็น float ครั้งเดียว: '1,000' -> 1000.0"""
+    return to_float(pick(payload, "amount_total", "amount", default=0))
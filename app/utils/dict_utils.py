@@ -0,0 +1,7 @@
+def pick(d: dict, *keys: str, default=None):
+    """คืนค่าแรกที่ truthy ตามลำดับ keys (แทน d.get(a) or d.get(b) or ...) ไม่เจอ -> default"""
+    for k in keys:
+        v = d.get(k)
+        if v:
+            return v
+    return default
@@ -6,6 +6,11 @@ from datetime import datetime, date
 from decimal import Decimal
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:  # optional C-accelerated encoder
+    orjson = None
+
 def get_nested_value(data: Dict[str, Any], path: str, default: Any = None) -> Any:
     """
     พระเอกของงาน: ดึงค่าจาก Nested JSON ด้วย String Path อย่างปลอดภัย
@@ -62,6 +67,37 @@ def json_serializer(obj: Any) -> Any:
     # ถ้ายังไม่รู้จัก ให้แปลงเป็น String ไปเลยกันตาย
     return str(obj)
 
+def canonical_json_bytes(obj: Any) -> bytes:
+    """
+    Sorted-key, compact UTF-8 JSON bytes — stable input for integrity hashes.
+    Uses orjson when available (bytes out, no str detour).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. int > 64-bit -> stdlib can still encode it
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def ndjson_line(obj: Any) -> bytes:
+    """
+    One NDJSON record (UTF-8 bytes + newline) for streaming responses
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj) + b"\n"
+        except orjson.JSONEncodeError:
+            pass  # non-str keys / int > 64-bit / unsupported types (LLM/tool output) -> stdlib
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse JSON bytes/str — orjson when available (reads bytes directly)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def safe_json_loads(json_str: str, default: Any = None) -> Any:
     """
     กันเหนียวเวลา parse string ที่ได้มาจาก LLM หรือ API อื่น